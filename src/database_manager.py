@@ -1,43 +1,233 @@
 import mysql.connector
 from mysql.connector import Error
-from collections import deque
+from array import array
+from functools import lru_cache
+from itertools import chain
+import hashlib
+import os
+import tempfile
 import threading
-import time
+
+from tqdm import tqdm
+
+from .utils import FILE_METADATA_FIELDS, error_code
+
+# mysqlclient (MySQLdb) is a C binding and encodes bulk INSERT parameters much
+# faster than the pure-Python connector; use it for indexing when installed.
+try:
+    import MySQLdb
+except ImportError:
+    MySQLdb = None
+
+INSERT_COLUMNS = (
+    "filepath", "filename", "extension", "size", "creation_time", "modification_time", "tags", "filepath_hash"
+)
+
+# Rough per-row allowance for separators, quoting, the numeric columns and the
+# escaped filepath_hash when estimating the size of a multi-row INSERT packet.
+ROW_OVERHEAD_BYTES = 160
+
+# Share of max_allowed_packet a multi-row INSERT may fill. Estimates count
+# characters, so this leaves room for multi-byte UTF-8 and escaping.
+PACKET_FILL_RATIO = 0.5
+
+UPSERT_CLAUSE = "ON DUPLICATE KEY UPDATE\n    " + ",\n    ".join(
+    f"{col} = VALUES({col})" for col in INSERT_COLUMNS[1:-1]
+)
+
+
+@lru_cache(maxsize=32)
+def build_insert_sql(row_count):
+    """Builds a multi-row INSERT ... ON DUPLICATE KEY UPDATE statement for row_count rows."""
+    row_placeholder = "(" + ", ".join(["%s"] * len(INSERT_COLUMNS)) + ")"
+    return (
+        f"INSERT INTO files ({', '.join(INSERT_COLUMNS)})\n"
+        f"VALUES {', '.join([row_placeholder] * row_count)}\n"
+        f"{UPSERT_CLAUSE}"
+    )
+
+
+# Secondary indexes on 'files' as name -> (index type, columns). They are dropped
+# for an initial bulk load and rebuilt afterwards in one pass; the UNIQUE
+# filepath_hash key always stays, since ON DUPLICATE KEY UPDATE relies on it.
+# The FULLTEXT indexes back word searches on filename and tags.
+SECONDARY_INDEXES = {
+    "idx_filename": ("INDEX", "filename"),
+    "idx_filepath_prefix": ("INDEX", "filepath(191)"),
+    "ft_filename": ("FULLTEXT INDEX", "filename"),
+    "ft_tags": ("FULLTEXT INDEX", "tags"),
+}
+
+# Escapes for the default LOAD DATA field/line terminators and escape character.
+TSV_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\0': '\\0'})
+
+STAGE_TABLE_SQL = """
+    CREATE TEMPORARY TABLE IF NOT EXISTS files_stage (
+        filepath VARCHAR(4096) NOT NULL,
+        filename VARCHAR(512) NOT NULL,
+        extension VARCHAR(50),
+        size BIGINT,
+        creation_time BIGINT,
+        modification_time BIGINT,
+        tags TEXT,
+        filepath_hash BINARY(32) NOT NULL
+    ) CHARACTER SET utf8
+"""
+
+# filepath_hash travels as hex in the TSV and is decoded on load.
+LOAD_STAGE_SQL = (
+    "LOAD DATA LOCAL INFILE %s INTO TABLE files_stage CHARACTER SET utf8 "
+    "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+    f"({', '.join(INSERT_COLUMNS[:-1])}, @filepath_hash_hex) "
+    "SET filepath_hash = UNHEX(@filepath_hash_hex)"
+)
+
+MERGE_STAGE_SQL = (
+    f"INSERT INTO files ({', '.join(INSERT_COLUMNS)})\n"
+    f"SELECT {', '.join(INSERT_COLUMNS)} FROM files_stage\n"
+    f"{UPSERT_CLAUSE}"
+)
+
+
+def hash_filepaths(filepaths):
+    """
+    Returns the SHA-256 digests used for the unique filepath_hash key, one per filepath.
+    hashlib's sha256 is OpenSSL's, which already uses SHA-NI/AVX2 where the CPU has them.
+    Paths that are not valid UTF-8 (undecodable names, which os.scandir surrogate-escapes)
+    cannot be stored in the utf8 table, so their digest is None and the row is skipped.
+    """
+    sha256 = hashlib.sha256
+    digests = []
+    for filepath in filepaths:
+        try:
+            digests.append(sha256(filepath.encode('utf-8')).digest())
+        except UnicodeEncodeError:
+            digests.append(None)
+    return digests
+
+
+def to_tsv_line(row):
+    """Encodes a row tuple as one LOAD DATA line; the trailing filepath_hash is written as hex."""
+    fields = [str(value).translate(TSV_ESCAPES) for value in row[:-1]]
+    fields.append(row[-1].hex())
+    return "\t".join(fields) + "\n"
+
+
+DB_ERRORS = (Error,) if MySQLdb is None else (Error, MySQLdb.Error)
+
+
+def is_connected(connection):
+    """Reports whether a mysql-connector or MySQLdb connection is still open."""
+    if hasattr(connection, 'is_connected'):
+        return connection.is_connected()
+    return bool(connection.open)
+
+
+def set_autocommit(connection, enabled):
+    """Sets autocommit on a mysql-connector (property) or MySQLdb (method) connection."""
+    if callable(connection.autocommit):
+        connection.autocommit(enabled)
+    else:
+        connection.autocommit = enabled
+
+
+# Deadlock and lock wait timeout; concurrent writers retry these batches.
+RETRYABLE_ERROR_CODES = (1213, 1205)
+MAX_BATCH_ATTEMPTS = 3
+
+# How often the progress bar is redrawn from the writers' counters.
+PROGRESS_REFRESH_SECONDS = 0.25
+
+
+# size, creation_time and modification_time are packed as signed 64-bit values so
+# the buffers hold 8 bytes per value instead of a reference to a Python int.
+PACKED_FIELDS = frozenset(('size', 'creation_time', 'modification_time'))
+
+
+def new_column_buffers():
+    """Returns empty column buffers, one per FILE_METADATA_FIELDS entry."""
+    return [array('q') if field in PACKED_FIELDS else [] for field in FILE_METADATA_FIELDS]
+
+
+class WriterShard:
+    """Column buffers, condition and progress counter owned by one writer thread."""
+    def __init__(self, use_load_data=False):
+        # One buffer per FILE_METADATA_FIELDS entry; row i is the i-th item of each.
+        self.file_data_columns = new_column_buffers()
+        self.cv = threading.Condition()
+        self.thread = None
+        self.queued_count = 0
+        self.processed_count = 0
+        # Cleared by this shard's writer alone when LOAD DATA fails on its connection.
+        self.use_load_data = use_load_data
+
 
 class DatabaseManager:
-    def __init__(self, db_config):
+    def __init__(self, db_config, batch_size=10000, use_load_data=False, num_writers=4, commit_every=10):
         self.db_config = db_config
+        self.batch_size = batch_size
+        # Batches written per transaction; fewer commits means fewer redo log flushes.
+        self.commit_every = commit_every
+        self.use_load_data = use_load_data
         self.connection = None
-        self.file_data_queue = deque()
+        # Files are routed to a shard by path, so each filepath_hash is only ever
+        # written by one writer and shards never contend for the same unique key.
+        self.num_writers = num_writers
+        self.shards = [WriterShard(use_load_data) for _ in range(num_writers)]
         self.is_indexing_finished = False
-        self.writer_thread = None
         self.stop_event = threading.Event()
-        self.processed_count = 0
+        self.progress_thread = None
+        self._writers_done = threading.Event()
+        self.max_allowed_packet = 16 * 1024 * 1024
+
+    @property
+    def processed_count(self):
+        """Rows committed so far, summed across writer shards."""
+        return sum(shard.processed_count for shard in self.shards)
+
+    @property
+    def queued_count(self):
+        """Files handed to the writers so far, summed across writer shards."""
+        return sum(shard.queued_count for shard in self.shards)
 
-    def connect(self):
+    def connect(self, **connect_args):
         """Establishes a connection to the MySQL database for the current thread."""
         try:
-            new_connection = mysql.connector.connect(**self.db_config)
-            if new_connection.is_connected():
+            new_connection = self._open_connection(**connect_args)
+            if is_connected(new_connection):
                 if threading.current_thread() == threading.main_thread():
                     print(f"Connected to MySQL database: {self.db_config['database']}")
                 return new_connection
-        except Error as e:
+        except DB_ERRORS as e:
             if threading.current_thread() == threading.main_thread():
                 print(f"Error connecting to MySQL database: {e}")
             else:
                 print(f"Error connecting to MySQL database in thread {threading.current_thread().name}: {e}")
             return None
 
+    def _open_connection(self, allow_local_infile=False):
+        """Opens a connection with MySQLdb when available, otherwise with mysql-connector."""
+        if MySQLdb is not None:
+            return MySQLdb.connect(
+                host=self.db_config['host'],
+                port=self.db_config['port'],
+                user=self.db_config['user'],
+                passwd=self.db_config['password'],
+                db=self.db_config['database'],
+                charset='utf8mb4',
+                local_infile=allow_local_infile,
+            )
+        return mysql.connector.connect(**self.db_config, allow_local_infile=allow_local_infile)
+
     def close(self):
         """Closes the database connection (only if it's the main thread's connection)."""
-        if self.connection and self.connection.is_connected() and threading.current_thread() == threading.main_thread():
+        if self.connection and is_connected(self.connection) and threading.current_thread() == threading.main_thread():
             self.connection.close()
             print("MySQL connection closed.")
 
     def create_table(self):
         """Creates the 'files' table if it doesn't exist."""
-        if not self.connection or not self.connection.is_connected():
+        if not self.connection or not is_connected(self.connection):
             self.connection = self.connect()
             if not self.connection:
                 print("Cannot create table: Main thread failed to connect to database.")
@@ -55,20 +245,101 @@ class DatabaseManager:
                         creation_time BIGINT,
                         modification_time BIGINT,
                         tags TEXT,
-                        filepath_hash BINARY(32) GENERATED ALWAYS AS (UNHEX(SHA2(filepath, 256))) STORED UNIQUE,
-                        INDEX idx_filename (filename),
-                        INDEX idx_filepath_prefix (filepath(191))
+                        filepath_hash BINARY(32) NOT NULL UNIQUE
                     ) CHARACTER SET utf8;
                 """)
+                self._migrate_generated_filepath_hash(cursor)
             print("Table 'files' ensured to exist.")
             return True
-        except Error as e:
+        except DB_ERRORS as e:
             print(f"Error creating table: {e}")
             raise
 
+    def _migrate_generated_filepath_hash(self, cursor):
+        """Turns a filepath_hash GENERATED column from older schemas into a plain column."""
+        cursor.execute("""
+            SELECT EXTRA FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'files' AND COLUMN_NAME = 'filepath_hash'
+        """)
+        row = cursor.fetchone()
+        if row and 'GENERATED' in str(row[0]).upper():
+            # Stored generated values are kept as the column's plain values.
+            cursor.execute("ALTER TABLE files MODIFY filepath_hash BINARY(32) NOT NULL")
+            print("Migrated 'files.filepath_hash' to a client-computed column.")
+
+    def _existing_secondary_indexes(self, cursor):
+        """Returns the names in SECONDARY_INDEXES that currently exist on 'files'."""
+        cursor.execute("""
+            SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'files'
+        """)
+        return {name for (name,) in cursor.fetchall() if name in SECONDARY_INDEXES}
+
+    def is_table_empty(self):
+        """Returns True if 'files' holds no rows; on any error assumes it does, so nothing is dropped."""
+        if not self.connection or not is_connected(self.connection):
+            self.connection = self.connect()
+            if not self.connection:
+                return False
+
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM files LIMIT 1")
+                return cursor.fetchone() is None
+        except DB_ERRORS as e:
+            print(f"Could not check whether 'files' is empty: {e}")
+            return False
+
+    def prepare_for_bulk_load(self):
+        """Drops the secondary indexes so a bulk load only maintains the primary and unique keys."""
+        if not self.connection or not is_connected(self.connection):
+            self.connection = self.connect()
+            if not self.connection:
+                print("Cannot prepare for bulk load: Main thread failed to connect to database.")
+                return False
+
+        try:
+            with self.connection.cursor() as cursor:
+                existing = self._existing_secondary_indexes(cursor)
+                if existing:
+                    cursor.execute("ALTER TABLE files " + ", ".join(f"DROP INDEX {name}" for name in sorted(existing)))
+            return True
+        except DB_ERRORS as e:
+            print(f"Error dropping secondary indexes: {e}")
+            return False
+
+    def restore_secondary_indexes(self):
+        """Adds any missing secondary indexes with bulk ALTER TABLEs so each is built in one sort pass."""
+        if not self.connection or not is_connected(self.connection):
+            self.connection = self.connect()
+            if not self.connection:
+                print("Cannot restore indexes: Main thread failed to connect to database.")
+                return False
+
+        try:
+            with self.connection.cursor() as cursor:
+                existing = self._existing_secondary_indexes(cursor)
+                missing = [name for name in SECONDARY_INDEXES if name not in existing]
+                if missing:
+                    print("Building secondary indexes...")
+                btree = [name for name in missing if SECONDARY_INDEXES[name][0] == "INDEX"]
+                if btree:
+                    cursor.execute("ALTER TABLE files " + ", ".join(
+                        f"ADD INDEX {name} ({SECONDARY_INDEXES[name][1]})" for name in btree
+                    ))
+                # InnoDB only builds one FULLTEXT index per ALTER TABLE.
+                for name in missing:
+                    index_type, columns = SECONDARY_INDEXES[name]
+                    if index_type != "INDEX":
+                        cursor.execute(f"ALTER TABLE files ADD {index_type} {name} ({columns})")
+            return True
+        except DB_ERRORS as e:
+            print(f"Error building secondary indexes: {e}")
+            return False
+
     def clear_all_indexes(self):
         """Clears all data from the 'files' table."""
-        if not self.connection or not self.connection.is_connected():
+        if not self.connection or not is_connected(self.connection):
             self.connection = self.connect()
             if not self.connection:
                 print("Cannot clear indexes: Main thread failed to connect to database.")
@@ -79,97 +350,254 @@ class DatabaseManager:
                 cursor.execute("TRUNCATE TABLE files;")
             print("All previous indexes cleared from the database.")
             return True
-        except Error as e:
+        except DB_ERRORS as e:
             print(f"Error clearing indexes: {e}")
             raise
 
-    def add_file_to_queue(self, file_metadata):
-        """Adds file metadata to an in-memory queue."""
-        self.file_data_queue.append(file_metadata)
+    def add_files_to_queue(self, records):
+        """
+        Appends FileMeta records to their shards' column buffers, taking each
+        shard's lock once per call, and wakes a writer once it has a full batch ready.
+        """
+        routed = [[] for _ in self.shards]
+        num_writers = self.num_writers
+        for record in records:
+            routed[(hash(record.dirpath) ^ hash(record.filename)) % num_writers].append(record)
+
+        for shard, shard_records in zip(self.shards, routed):
+            if not shard_records:
+                continue
+            field_values = list(zip(*shard_records))
+            with shard.cv:
+                for column, values in zip(shard.file_data_columns, field_values):
+                    column.extend(values)
+                shard.queued_count += len(shard_records)
+                if len(shard.file_data_columns[0]) >= self.batch_size:
+                    shard.cv.notify()
 
     def set_indexing_finished(self):
         """Signals that all file scanning is complete."""
         self.is_indexing_finished = True
+        for shard in self.shards:
+            with shard.cv:
+                shard.cv.notify_all()
 
     def start_writer_thread(self, total_expected_files=0):
-        """Starts a dedicated thread for writing data to the database."""
-        self.writer_thread = threading.Thread(target=self._database_writer_loop)
-        self.writer_thread.start()
+        """Starts one dedicated thread per shard for writing data to the database, plus a progress reporter."""
+        self._writers_done.clear()
+        for shard_id, shard in enumerate(self.shards):
+            shard.use_load_data = self.use_load_data
+            shard.thread = threading.Thread(
+                target=self._database_writer_loop, args=(shard,), name=f"db-writer-{shard_id}"
+            )
+            shard.thread.start()
+        self.progress_thread = threading.Thread(
+            target=self._progress_reporter_loop, args=(total_expected_files,), daemon=True
+        )
+        self.progress_thread.start()
 
     def wait_for_writer_thread(self):
-        """Waits for the database writer thread to complete."""
-        if self.writer_thread:
-            self.writer_thread.join()
+        """Waits for all database writer threads to complete."""
+        for shard in self.shards:
+            if shard.thread:
+                shard.thread.join()
+        self._writers_done.set()
+        if self.progress_thread:
+            self.progress_thread.join()
+            print("Database writer threads finished.")
+
+    def _progress_reporter_loop(self, total_expected_files):
+        """Redraws the progress bar from the shard counters, keeping tqdm's lock and rendering off the writers."""
+        with tqdm(total=total_expected_files or None, unit='files', desc='Indexing') as progress:
+            while True:
+                finished = self._writers_done.wait(PROGRESS_REFRESH_SECONDS)
+                # Until scanning ends, the total is however many files have been found so far.
+                progress.total = max(total_expected_files, self.queued_count)
+                progress.n = self.processed_count
+                if finished:
+                    break
+                progress.refresh()
 
-    def _database_writer_loop(self):
-        """The main loop for the database writer thread."""
+    def _database_writer_loop(self, shard):
+        """The main loop for one shard's database writer thread."""
         writer_connection = None
         try:
-            writer_connection = self.connect()
-            if not writer_connection or not writer_connection.is_connected():
+            writer_connection = self.connect(allow_local_infile=shard.use_load_data)
+            if not writer_connection or not is_connected(writer_connection):
                 print("Database writer failed to establish its own connection, exiting.")
                 return
 
-            writer_connection.autocommit = False
+            set_autocommit(writer_connection, False)
             cursor = writer_connection.cursor()
-            batch_size = 1000
-            batch_data = []
-
-            insert_sql = """
-                INSERT INTO files (filepath, filename, extension, size, creation_time, modification_time, tags)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                    filename = VALUES(filename),
-                    extension = VALUES(extension),
-                    size = VALUES(size),
-                    creation_time = VALUES(creation_time),
-                    modification_time = VALUES(modification_time),
-                    tags = VALUES(tags)
-            """
-
+            self._load_max_allowed_packet(cursor)
+            if shard.use_load_data:
+                self._create_stage_table(cursor, shard)
+            # (rows, estimated_bytes) of batches written since the last commit.
+            pending = []
             while True:
+                with shard.cv:
+                    while len(shard.file_data_columns[0]) < self.batch_size and not self.is_indexing_finished:
+                        shard.cv.wait(timeout=1.0)
+                    # Swap the buffers out so producers are only blocked for the swap itself.
+                    columns = shard.file_data_columns
+                    shard.file_data_columns = new_column_buffers()
+
+                if not columns[0]: # Indexing finished and buffers drained
+                    break
+                for start in range(0, len(columns[0]), self.batch_size):
+                    batch_columns = [column[start:start + self.batch_size] for column in columns]
+                    shard.processed_count += self._execute_batch(cursor, batch_columns, writer_connection, pending, shard)
+
+            if pending:
                 try:
-                    file_metadata = self.file_data_queue.popleft()
-                    batch_data.append(file_metadata)
-
-                    if len(batch_data) >= batch_size:
-                        self._execute_batch(cursor, insert_sql, batch_data, writer_connection)
-                        batch_data.clear()
-                except IndexError: # Queue is empty
-                    if self.is_indexing_finished and not self.file_data_queue:
-                        break
-                    time.sleep(0.01)
-
-            if batch_data:
-                self._execute_batch(cursor, insert_sql, batch_data, writer_connection)
-            
+                    shard.processed_count += self._commit_pending(writer_connection, pending)
+                except DB_ERRORS as e:
+                    print(f"Error committing final batches: {e}")
+                    writer_connection.rollback()
+
             cursor.close()
-            print("\nDatabase writer thread finished.")
 
-        except Error as e:
+        except DB_ERRORS as e:
             print(f"Error in database writer thread: {e}")
         finally:
-            if writer_connection and writer_connection.is_connected():
+            if writer_connection and is_connected(writer_connection):
                 writer_connection.close()
 
-    def _execute_batch(self, cursor, sql, batch, connection_for_commit):
-        """Executes a batch of inserts/updates."""
-        data_tuples = []
-        for meta in batch:
-            data_tuples.append((
-                meta['filepath'], meta['filename'], meta['extension'],
-                meta['size'], meta['creation_time'], meta['modification_time'],
-                meta['tags']
-            ))
+    def _load_max_allowed_packet(self, cursor):
+        """
+        Reads the server's max_allowed_packet so multi-row INSERTs can be sized to fit.
+        The session value is read-only (it mirrors the global), so it is read rather than set.
+        """
         try:
-            cursor.executemany(sql, data_tuples)
-            connection_for_commit.commit()
-            self.processed_count += len(batch)
-        except Error as e:
-            print(f"Error during batch execution: {e}")
-            connection_for_commit.rollback()
+            cursor.execute("SELECT @@max_allowed_packet")
+            row = cursor.fetchone()
+            if row and row[0]:
+                self.max_allowed_packet = int(row[0])
+        except DB_ERRORS as e:
+            print(f"Could not read max_allowed_packet, assuming {self.max_allowed_packet} bytes: {e}")
+
+    def _create_stage_table(self, cursor, shard):
+        """Creates the session-local staging table used by LOAD DATA, disabling the shard's bulk load on failure."""
+        try:
+            cursor.execute(STAGE_TABLE_SQL)
+        except DB_ERRORS as e:
+            print(f"Could not create staging table, falling back to INSERT: {e}")
+            shard.use_load_data = False
+
+    def _execute_batch(self, cursor, batch_columns, connection_for_commit, pending, shard):
+        """
+        Writes a batch, given as FILE_METADATA_FIELDS columns, inside the writer's open
+        transaction and commits once commit_every batches are pending.
+        Returns the number of rows committed by this call.
+        """
+        dirpaths, filenames, extensions, sizes, creation_times, modification_times, tags = batch_columns
+        filepaths = list(map(os.path.join, dirpaths, filenames))
+        filepath_hashes = hash_filepaths(filepaths)
+        data_tuples = list(zip(
+            filepaths, filenames, extensions,
+            sizes, creation_times, modification_times,
+            tags, filepath_hashes
+        ))
+        if None in filepath_hashes:
+            # Skipped on both write paths: neither the TSV file nor the INSERT can encode them.
+            for row in data_tuples:
+                if row[-1] is None:
+                    print(f"Warning: Skipping file whose path is not valid UTF-8: {row[0]!r}")
+            data_tuples = [row for row in data_tuples if row[-1] is not None]
+            if not data_tuples:
+                return 0
+            filepaths = [row[0] for row in data_tuples]
+            filenames = [row[1] for row in data_tuples]
+            extensions = [row[2] for row in data_tuples]
+            tags = [row[6] for row in data_tuples]
+        estimated_bytes = (
+            sum(map(len, filepaths)) + sum(map(len, filenames)) + sum(map(len, extensions))
+            + sum(map(len, tags)) + ROW_OVERHEAD_BYTES * len(filepaths)
+        )
+        pending.append((data_tuples, estimated_bytes))
+
+        to_write = pending[-1:]
+        attempt = 1
+        while True:
+            # The path this attempt takes; the except arm must judge the failure by it.
+            loading = shard.use_load_data
+            try:
+                for rows, rows_bytes in to_write:
+                    self._write_rows(cursor, rows, rows_bytes, loading)
+                if len(pending) >= self.commit_every:
+                    return self._commit_pending(connection_for_commit, pending)
+                return 0
+            except DB_ERRORS as e:
+                retryable = error_code(e) in RETRYABLE_ERROR_CODES
+                if loading and not retryable:
+                    # A rejected LOAD DATA (e.g. local_infile off); the replay does not count as an attempt.
+                    print(f"LOAD DATA LOCAL INFILE failed, falling back to INSERT: {e}")
+                    shard.use_load_data = False
+                elif not retryable or attempt == MAX_BATCH_ATTEMPTS:
+                    print(f"Error during batch execution: {e}")
+                    if len(to_write) == 1 and len(pending) > 1:
+                        # Only the failed statement was rolled back; earlier batches are still pending.
+                        pending.pop()
+                    else:
+                        connection_for_commit.rollback()
+                        print(f"Discarded {sum(len(rows) for rows, _ in pending)} uncommitted rows.")
+                        pending.clear()
+                    return 0
+                else:
+                    attempt += 1
+                # Deadlocks (and the LOAD DATA fallback) abort the whole transaction,
+                # so replay every batch written since the last commit.
+                connection_for_commit.rollback()
+                to_write = pending
+
+    def _commit_pending(self, connection_for_commit, pending):
+        """Commits the open transaction and returns how many pending rows it made durable."""
+        connection_for_commit.commit()
+        committed = sum(len(rows) for rows, _ in pending)
+        pending.clear()
+        return committed
+
+    def _write_rows(self, cursor, data_tuples, estimated_bytes, use_load_data):
+        """Writes rows through LOAD DATA when use_load_data is set, otherwise through INSERT."""
+        if use_load_data:
+            self._load_rows_via_stage(cursor, data_tuples)
+        else:
+            self._insert_rows(cursor, data_tuples, estimated_bytes)
+
+    def _insert_rows(self, cursor, data_tuples, estimated_bytes):
+        """Sends rows as one multi-row INSERT, split into several if it would not fit in max_allowed_packet."""
+        packet_limit = self.max_allowed_packet * PACKET_FILL_RATIO
+        if estimated_bytes <= packet_limit:
+            cursor.execute(build_insert_sql(len(data_tuples)), list(chain.from_iterable(data_tuples)))
+            return
+
+        start = 0
+        chunk_bytes = 0
+        for index, row in enumerate(data_tuples):
+            row_bytes = len(row[0]) + len(row[1]) + len(row[2]) + len(row[6]) + ROW_OVERHEAD_BYTES
+            if chunk_bytes + row_bytes > packet_limit and index > start:
+                chunk = data_tuples[start:index]
+                cursor.execute(build_insert_sql(len(chunk)), list(chain.from_iterable(chunk)))
+                start = index
+                chunk_bytes = 0
+            chunk_bytes += row_bytes
+        chunk = data_tuples[start:]
+        cursor.execute(build_insert_sql(len(chunk)), list(chain.from_iterable(chunk)))
+
+    def _load_rows_via_stage(self, cursor, data_tuples):
+        """Bulk loads rows into the session's staging table and merges them into 'files'."""
+        tsv_file = tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='', suffix='.tsv', delete=False)
+        try:
+            with tsv_file:
+                tsv_file.writelines(to_tsv_line(row) for row in data_tuples)
+            # Not TRUNCATE: it commits implicitly, which would end the open transaction.
+            cursor.execute("DELETE FROM files_stage")
+            cursor.execute(LOAD_STAGE_SQL, (tsv_file.name,))
+            cursor.execute(MERGE_STAGE_SQL)
+        finally:
+            os.remove(tsv_file.name)
 
     def stop_writer_thread(self):
-        """Gracefully stops the writer thread."""
+        """Gracefully stops the writer threads."""
         self.stop_event.set()
         self.wait_for_writer_thread()
\ No newline at end of file
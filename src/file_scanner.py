@@ -1,18 +1,72 @@
 import os
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
 from concurrent.futures import ThreadPoolExecutor
-from queue import Queue
+from queue import Empty, Queue
 
-from .utils import get_file_metadata
+from .utils import get_file_metadata_from_entry
 from .database_manager import DatabaseManager
 
+# A worker shares half of its pending directories once its local stack grows past this.
+LOCAL_STACK_SHARE_THRESHOLD = 32
+
+# Records a worker collects before handing them to the database manager in one call.
+PRODUCER_FLUSH_SIZE = 1024
+
+# How long an idle worker blocks on the shared queue before re-checking stop_event.
+QUEUE_POLL_SECONDS = 0.1
+
+SCANDIR_SUPPORTS_FD = os.scandir in os.supports_fd and hasattr(os, 'O_DIRECTORY')
+
+
+@contextmanager
+def scan_entries(current_dir):
+    """
+    Opens an os.scandir iterator over current_dir.
+    Where supported (Linux), the directory is opened once and scanned through its
+    descriptor, so DirEntry.stat() is an fstatat() relative to it instead of a
+    lookup of the full path for every file. Entries then carry only their name in
+    entry.path, so callers build child paths from current_dir and entry.name.
+    """
+    if not SCANDIR_SUPPORTS_FD:
+        with os.scandir(current_dir) as entries:
+            yield entries
+        return
+
+    dir_fd = os.open(current_dir, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        with os.scandir(dir_fd) as entries:
+            yield entries
+    finally:
+        os.close(dir_fd)
+
+
 class FileScanner:
     def __init__(self, db_manager: DatabaseManager, num_threads=None):
         self.db_manager = db_manager
         self.num_threads = num_threads if num_threads else os.cpu_count() * 2
         self.path_queue = Queue()
-        self.total_files_scanned = 0
-        self.total_directories_scanned = 0
-        self.active_scan_tasks = 0
+        self.stop_event = threading.Event()
+        self.root_directories = 0
+        # Per-worker counters, keyed by worker id. Each worker only writes its own key.
+        self._files_scanned = Counter()
+        self._directories_scanned = Counter()
+
+    @property
+    def total_files_scanned(self):
+        """Files collected for indexing so far, summed across workers."""
+        return sum(list(self._files_scanned.values()))
+
+    @property
+    def total_directories_scanned(self):
+        """Root and discovered directories so far, summed across workers."""
+        return self.root_directories + sum(list(self._directories_scanned.values()))
+
+    @property
+    def active_scan_tasks(self):
+        """Directories queued or being scanned that have not been marked done yet."""
+        return self.path_queue.unfinished_tasks
 
     def start_scanning(self, root_paths):
         """Initiates the multi-threaded file scanning process."""
@@ -20,47 +74,72 @@ class FileScanner:
         
         for path in root_paths:
             self.path_queue.put(path)
-            self.total_directories_scanned += 1
-            self.active_scan_tasks += 1
+            self.root_directories += 1
 
         with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
-            for _ in range(self.num_threads):
-                executor.submit(self._scan_directory_task)
-            
-            self.path_queue.join() 
+            for worker_id in range(self.num_threads):
+                executor.submit(self._scan_directory_task, worker_id)
             
-            for _ in range(self.num_threads):
-                self.path_queue.put(None) 
-
-            executor.shutdown(wait=True) 
+            # Every queued directory has been fully walked; idle workers exit on their next poll.
+            self.path_queue.join()
+            self.stop_event.set()
 
         self.db_manager.set_indexing_finished()
         print(f"\nFile scanning completed. Scanned {self.total_files_scanned} files and {self.total_directories_scanned} directories.")
 
-    def _scan_directory_task(self):
-        """Worker task for scanning directories."""
+    def _scan_directory_task(self, worker_id):
+        """Worker task for scanning directories.
+
+        Each directory taken from the shared queue is walked depth-first on a
+        local stack; directories only go back to the shared queue when the local
+        stack grows large enough to feed idle workers.
+        """
+        files_scanned = 0
+        directories_scanned = 0
+        pending_files = []
         while True:
-            current_dir = self.path_queue.get()
-            
-            if current_dir is None: 
-                self.path_queue.task_done()
-                break
+            try:
+                root_dir = self.path_queue.get(timeout=QUEUE_POLL_SECONDS)
+            except Empty:
+                if self.stop_event.is_set():
+                    break
+                continue
 
+            local_dirs = deque([root_dir])
             try:
-                for entry in os.scandir(current_dir):
-                    if entry.is_dir(follow_symlinks=False):
-                        self.path_queue.put(entry.path)
-                        self.active_scan_tasks += 1
-                        self.total_directories_scanned += 1
-                    elif entry.is_file(follow_symlinks=False):
-                        metadata = get_file_metadata(entry.path)
-                        if metadata:
-                            self.db_manager.add_file_to_queue(metadata)
-                            self.total_files_scanned += 1
-            except PermissionError:
-                pass
-            except Exception as e:
-                print(f"Error scanning {current_dir}: {e}")
+                while local_dirs:
+                    # Every file record from this directory references this one string.
+                    current_dir = local_dirs.pop()
+                    try:
+                        with scan_entries(current_dir) as entries:
+                            for entry in entries:
+                                if entry.is_dir(follow_symlinks=False):
+                                    local_dirs.append(os.path.join(current_dir, entry.name))
+                                    directories_scanned += 1
+                                elif entry.is_file(follow_symlinks=False):
+                                    metadata = get_file_metadata_from_entry(entry, current_dir)
+                                    if metadata:
+                                        pending_files.append(metadata)
+                                        files_scanned += 1
+                    except PermissionError:
+                        pass
+                    except Exception as e:
+                        print(f"Error scanning {current_dir}: {e}")
+
+                    if len(pending_files) >= PRODUCER_FLUSH_SIZE:
+                        self.db_manager.add_files_to_queue(pending_files)
+                        pending_files = []
+
+                    if len(local_dirs) > LOCAL_STACK_SHARE_THRESHOLD:
+                        for _ in range(len(local_dirs) // 2):
+                            self.path_queue.put(local_dirs.popleft())
+
+                    self._files_scanned[worker_id] = files_scanned
+                    self._directories_scanned[worker_id] = directories_scanned
             finally:
+                # Hand over what is left before marking the work done, so every file
+                # is queued by the time path_queue.join() returns.
+                if pending_files:
+                    self.db_manager.add_files_to_queue(pending_files)
+                    pending_files = []
                 self.path_queue.task_done()
-                self.active_scan_tasks -= 1
\ No newline at end of file
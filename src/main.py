@@ -1,11 +1,16 @@
+import argparse
+import asyncio
 import os
 import time
 import sys
 
-from .utils import parse_db_config
+from .utils import parse_db_config, parse_search_config
 from .database_manager import DatabaseManager
 from .file_scanner import FileScanner
-from .search_manager import SearchManager
+from .search_manager import SearchManager, AsyncSearchManager, invalidate_search_cache
+
+# Results shown per search unless --limit or --no-limit is given.
+DEFAULT_SEARCH_LIMIT = 500
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
@@ -50,6 +55,11 @@ def run_indexer():
         print("Indexer cannot proceed: Database table could not be created or accessed.")
         return
 
+    # Loading into an empty table is write-heavy, so stream it through LOAD DATA LOCAL INFILE
+    # and build the secondary indexes once at the end.
+    initial_index = db_manager.is_table_empty()
+    db_manager.use_load_data = initial_index
+
     root_dirs = []
     print("\nEnter root directories to index (one per line, press Enter on empty line to finish):")
     while True:
@@ -66,6 +76,9 @@ def run_indexer():
         db_manager.close()
         return
 
+    if initial_index:
+        db_manager.prepare_for_bulk_load()
+
     start_time = time.perf_counter()
     file_scanner = FileScanner(db_manager)
     
@@ -75,6 +88,8 @@ def run_indexer():
 
     print("\nAll scanning tasks initiated. Waiting for database writes to complete...")
     db_manager.wait_for_writer_thread()
+    db_manager.restore_secondary_indexes()
+    invalidate_search_cache()
 
     end_time = time.perf_counter()
     print(f"\nTotal indexing duration: {end_time - start_time:.2f} seconds.")
@@ -85,23 +100,67 @@ def run_indexer():
     save_indexed_roots(list(new_roots))
 
 
-def run_search():
-    db_config = parse_db_config()
-    search_manager = SearchManager(db_config)
+def prompt_search():
+    """Asks for a search term and field; returns (term, search_by), or None to leave search."""
+    search_term = input("Enter search term (or 'exit' to quit): ").strip()
+    if search_term.lower() == 'exit':
+        return None
 
-    print("\n--- File Search ---")
-    while True:
-        search_term = input("Enter search term (or 'exit' to quit): ").strip()
-        if search_term.lower() == 'exit':
-            break
+    search_type = input("Search by (filename/path/tags/all - default is filename): ").strip().lower()
+    if search_type not in ['filename', 'path', 'tags', 'all']:
+        search_type = 'filename'
+    return search_term, search_type
 
-        search_type = input("Search by (filename/path/tags - default is filename): ").strip().lower()
-        if search_type not in ['filename', 'path', 'tags']:
-            search_type = 'filename'
 
-        results = search_manager.search_files(search_term, search_type)
-        search_manager.display_search_results(results)
-        print("-" * 60)
+def run_search(use_async=False, limit=None):
+    db_config = parse_db_config()
+    search_config = parse_search_config()
+    if use_async:
+        asyncio.run(run_search_async(db_config, search_config, limit))
+        return
+
+    with SearchManager(
+        db_config,
+        pool_size=search_config['pool_size'],
+        fetch_size=search_config['fetch_size'],
+        fulltext=search_config['fulltext']
+    ) as search_manager:
+        print("\n--- File Search ---")
+        while True:
+            search = prompt_search()
+            if search is None:
+                break
+            search_term, search_type = search
+
+            if search_type == 'all':
+                results = search_manager.search_files_multi(search_term, limit=limit)
+            else:
+                results = search_manager.search_files(search_term, search_type, limit)
+            search_manager.display_search_results(results, limit)
+            print("-" * 60)
+
+
+async def run_search_async(db_config, search_config, limit=None):
+    """The search prompt loop on AsyncSearchManager, used with --async."""
+    async with AsyncSearchManager(
+        db_config,
+        maxsize=search_config['pool_size'],
+        fetch_size=search_config['fetch_size'],
+        fulltext=search_config['fulltext']
+    ) as search_manager:
+        print("\n--- File Search (async) ---")
+        while True:
+            search = prompt_search()
+            if search is None:
+                break
+            search_term, search_type = search
+
+            if search_type == 'all':
+                results = search_manager.search_files_multi(search_term, limit=limit)
+            else:
+                results = search_manager.search_files(search_term, search_type, limit)
+            await search_manager.display_search_results(results, limit)
+            print("-" * 60)
 
 
 def clear_index():
@@ -114,6 +173,7 @@ def clear_index():
     if confirm == 'yes':
         if db_manager.clear_all_indexes():
             clear_indexed_roots_file() 
+            invalidate_search_cache()
             print("Index clearing process completed.")
         else:
             print("Index clearing failed.")
@@ -121,7 +181,31 @@ def clear_index():
         print("Index clearing cancelled.")
 
 
+def positive_int(value):
+    """argparse type for options that must be a whole number of at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value!r}")
+    return number
+
+
+def parse_args():
+    """Parses the command-line options."""
+    parser = argparse.ArgumentParser(description="Multi-threaded file indexer and search.")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help="run searches on the aiomysql-based AsyncSearchManager")
+    parser.add_argument('--limit', type=positive_int, default=DEFAULT_SEARCH_LIMIT,
+                        help=f"show at most this many results per search (default: {DEFAULT_SEARCH_LIMIT})")
+    parser.add_argument('--no-limit', dest='limit', action='store_const', const=None,
+                        help="show every matching result")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
     print("Welcome to the Multi-threaded File Indexer and Search!")
     while True:
         print("\nChoose an option:")
@@ -135,7 +219,7 @@ def main():
         if choice == '1':
             run_indexer()
         elif choice == '2':
-            run_search()
+            run_search(args.use_async, args.limit)
         elif choice == '3': 
             clear_index()
         elif choice == '4': 
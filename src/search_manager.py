@@ -1,77 +1,486 @@
-import os
+import re
+import sys
+import threading
+from collections import OrderedDict
 import mysql.connector
+import mysql.connector.pooling
 from mysql.connector import Error
-from .utils import parse_db_config, format_navigable_path
+from .utils import parse_db_config, format_navigable_path, error_code
+
+# aiomysql is only needed by AsyncSearchManager, so it stays an optional dependency.
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+# Shared by every SearchManager in the process so repeated searches reuse
+# authenticated connections instead of reconnecting for each query.
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+# Search statements by search_by value, run as server-side prepared statements.
+_SQL = {
+    'filename': "SELECT filepath, filename FROM files WHERE filename LIKE %s",
+    'path': "SELECT filepath, filename FROM files WHERE filepath LIKE %s",
+    'tags': "SELECT filepath, filename FROM files WHERE tags LIKE %s",
+}
+
+# Column searched for each search_by value.
+_SEARCH_COLUMNS = {'filename': 'filename', 'path': 'filepath', 'tags': 'tags'}
+
+# Word-prefix searches served by the FULLTEXT indexes instead of a LIKE '%q%' table scan.
+_FULLTEXT_SQL = {
+    'filename': "SELECT filepath, filename FROM files WHERE MATCH(filename) AGAINST (%s IN BOOLEAN MODE)",
+    'tags': "SELECT filepath, filename FROM files WHERE MATCH(tags) AGAINST (%s IN BOOLEAN MODE)",
+}
+
+# ER_FT_MATCHING_KEY_NOT_FOUND: the table has no FULLTEXT index yet (created before
+# the indexes existed, or dropped during an initial bulk load).
+FULLTEXT_INDEX_MISSING = 1191
+
+# InnoDB's default innodb_ft_min_token_size; shorter words are not in the index.
+FULLTEXT_MIN_TOKEN_SIZE = 3
+
+# Letters, digits and '_' form one word for the FULLTEXT parser, so query words match its tokens.
+_WORD_RE = re.compile(r'\w+')
+
+
+def to_fulltext_query(query):
+    """
+    Turns a search term into a boolean-mode query requiring a word starting with
+    each of its words, e.g. 'report.pdf' -> '+report* +pdf*'.
+    Returns None when any word is too short to be in the index.
+    """
+    words = _WORD_RE.findall(query)
+    if not words or any(len(word) < FULLTEXT_MIN_TOKEN_SIZE for word in words):
+        return None
+    return " ".join(f"+{word}*" for word in words)
+
+
+def build_search_statement(query, search_by, fulltext=True, limit=None):
+    """
+    Returns the (sql, params) of a single-field search, or None for an unknown search_by.
+    With fulltext, filename and tag searches whose words are all long enough use the
+    FULLTEXT indexes; other searches use LIKE '%query%'.
+    A limit is pushed into the statement so the server stops after that many rows.
+    """
+    sql = _SQL.get(search_by)
+    if sql is None:
+        return None
+    fulltext_query = to_fulltext_query(query) if fulltext and search_by in _FULLTEXT_SQL else None
+    if fulltext_query is not None:
+        return with_limit(_FULLTEXT_SQL[search_by], (fulltext_query,), limit)
+    return with_limit(sql, (f"%{query}%",), limit)
+
+
+def build_multi_search_statement(query, fields, fulltext=True, limit=None):
+    """
+    Returns the (sql, params) of one OR query across fields, or None if any field is unknown.
+    """
+    columns = [_SEARCH_COLUMNS.get(field) for field in fields]
+    if not columns or None in columns:
+        return None
+    if len(columns) == 1:
+        return build_search_statement(query, fields[0], fulltext, limit)
+    # Each file is one row, so OR-ing the predicates cannot return duplicates.
+    sql = "SELECT filepath, filename FROM files WHERE " + " OR ".join(f"{column} LIKE %s" for column in columns)
+    return with_limit(sql, (f"%{query}%",) * len(columns), limit)
+
+
+def with_limit(sql, params, limit):
+    """Appends a bound LIMIT to a search statement; limit None leaves it unbounded."""
+    if limit is None:
+        return sql, params
+    return sql + " LIMIT %s", params + (int(limit),)
+
+
+def get_connection_pool(db_config, pool_size):
+    """Returns the process-wide search connection pool, creating it on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = mysql.connector.pooling.MySQLConnectionPool(
+                pool_name="filex", pool_size=pool_size, **db_config
+            )
+        return _POOL
+
+
+class SearchResultCache:
+    """A small thread-safe LRU of complete search results keyed by (statement, parameter)."""
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached result tuple for key, or None."""
+        with self._lock:
+            rows = self._entries.get(key)
+            if rows is not None:
+                self._entries.move_to_end(key)
+            return rows
+
+    def put(self, key, rows):
+        """Stores rows for key, evicting the least recently used entries past maxsize."""
+        with self._lock:
+            self._entries[key] = rows
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drops every cached result."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Result sets larger than this are streamed but not cached, so the cache
+# cannot undo the bounded memory use of streaming.
+MAX_CACHED_ROWS = 10000
+
+_RESULT_CACHE = SearchResultCache()
+
+# Results formatted per stdout write, so long listings are not one write per line
+# but still appear while rows are being streamed.
+DISPLAY_WRITE_ROWS = 200
+
+NAVIGATE_HINT = "  To navigate, open File Explorer and copy the 'Full Path' and paste it into the address bar.\n"
+SEP = "=" * 60 + "\n"
+
+
+def invalidate_search_cache():
+    """Drops cached search results; call after the index has changed."""
+    _RESULT_CACHE.clear()
+
+
+def write_search_results(results):
+    """Writes (filepath, filename) results to stdout in blocks and returns how many there were."""
+    count = 0
+    chunks = []
+    append = chunks.append
+    write = sys.stdout.write
+    for filepath, filename in results:
+        count += 1
+        navigable_path, parent_dir = format_navigable_path(filepath)
+        append(
+            f"\n--- Found: {filename} ---\n"
+            f"  **Location:** {navigable_path}\n"
+            f"  **Full Path:** {filepath}\n"
+            f"{NAVIGATE_HINT}"
+            f"  Parent Folder: '{parent_dir}'\n"
+            f"{SEP}"
+        )
+        if len(chunks) >= DISPLAY_WRITE_ROWS:
+            write("".join(chunks))
+            chunks.clear()
+
+    if chunks:
+        write("".join(chunks))
+    return count
+
+
+def print_search_summary(count, limit=None):
+    """Prints the closing line of a result listing; limit is the one the search ran with."""
+    if not count:
+        print("No files or folders found matching your query.")
+        return
+    if limit is not None and count >= limit:
+        print(f"\nShowing the first {count} results; there may be more. Use --no-limit to list every match.")
+        return
+    print(f"\nFound {count} results.")
 
 class SearchManager:
-    def __init__(self, db_config):
+    """
+    Runs searches over one pooled connection held for the whole session.
+    Use as a context manager, or call connect() and close() around a series of searches.
+    The pool opens all pool_size connections up front, so the default of 1 matches the
+    one connection a manager uses; raise it only when several managers search at once.
+    """
+    def __init__(self, db_config, pool_size=1, fetch_size=1000, fulltext=True):
         self.db_config = db_config
+        self.pool_size = pool_size
+        self.fetch_size = fetch_size
+        self.fulltext = fulltext
         self.connection = None
+        # Prepared cursors by statement, so each statement is prepared once per connection.
+        self._cursors = {}
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def connect(self):
-        """Establishes a connection to the MySQL database."""
+        """Takes a connection to the MySQL database from the search connection pool."""
         try:
-            self.connection = mysql.connector.connect(**self.db_config)
+            self.connection = get_connection_pool(self.db_config, self.pool_size).get_connection()
             if self.connection.is_connected():
                 return True
-        except Error as e:
+        # PoolError is an Error; an out-of-range pool_size raises AttributeError instead.
+        except (Error, AttributeError) as e:
             print(f"Error connecting for search: {e}")
             self.connection = None
             return False
         return False
 
     def close(self):
-        """Closes the database connection."""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
+        """Closes the prepared cursors and returns the database connection to the pool."""
+        for cursor in self._cursors.values():
+            try:
+                cursor.close()
+            except Error:
+                pass
+        self._cursors.clear()
+        if self.connection is not None:
+            try:
+                # Always hand a pooled connection back, even a dropped one,
+                # or its pool slot is lost for the rest of the process.
+                self.connection.close()
+            except Error as e:
+                print(f"Error returning search connection to the pool: {e}")
+        self.connection = None
 
-    def search_files(self, query, search_by='filename'):
-        """Searches the database for files based on the query."""
-        if not self.connect():
+    def _discard_cursor(self, sql):
+        """Closes and forgets the prepared cursor for sql."""
+        cursor = self._cursors.pop(sql, None)
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Error:
+                pass
+
+    def _get_cursor(self, sql):
+        """Returns the prepared cursor for sql on the session connection, creating it on first use."""
+        cursor = self._cursors.get(sql)
+        if cursor is None:
+            # Prepared cursors are unbuffered: rows are read from the server as they are fetched.
+            cursor = self.connection.cursor(prepared=True)
+            cursor.arraysize = self.fetch_size
+            self._cursors[sql] = cursor
+        return cursor
+
+    def search_files(self, query, search_by='filename', limit=None):
+        """
+        Searches the database for files based on the query, yielding (filepath, filename) tuples.
+        The statement is chosen by build_search_statement; with a limit, at most
+        that many rows are returned.
+        Complete result sets of up to MAX_CACHED_ROWS rows are cached, so repeating a
+        search is answered without a database round trip until the index changes.
+        Rows are streamed from an unbuffered prepared cursor in chunks of fetch_size, so
+        the session connection is busy until the generator is exhausted or closed; wrap
+        the call in list(...) when all results are needed at once.
+        """
+        statement = build_search_statement(query, search_by, self.fulltext, limit)
+        if statement is None:
+            print("Invalid search_by criteria.")
+            return
+        fallback = build_search_statement(query, search_by, False, limit)
+        yield from self._run_search(*statement, fallback if fallback != statement else None)
+
+    def search_files_multi(self, query, fields=('filename', 'path', 'tags'), limit=None):
+        """
+        Searches several fields at once with a single OR query, so the table is scanned
+        once instead of once per field. Yields (filepath, filename) tuples like search_files.
+        """
+        statement = build_multi_search_statement(query, fields, self.fulltext, limit)
+        if statement is None:
+            print("Invalid search_by criteria.")
+            return
+        fallback = build_multi_search_statement(query, fields, False, limit)
+        yield from self._run_search(*statement, fallback if fallback != statement else None)
+
+    def _run_search(self, sql, params, fallback=None):
+        """
+        Streams the rows of a search statement, serving and filling the result cache.
+        fallback is the LIKE statement (sql, params) to run if a FULLTEXT statement
+        finds no FULLTEXT index on the table.
+        """
+        cache_key = (sql, params)
+        cached_rows = _RESULT_CACHE.get(cache_key)
+        if cached_rows is not None:
+            yield from cached_rows
+            return
+
+        if self.connection is None and not self.connect():
             print("Cannot search: Database connection failed.")
-            return []
+            return
 
-        results = []
-        cursor = None
         try:
-            cursor = self.connection.cursor(buffered=True)
-            
-            if search_by == 'filename':
-                sql = "SELECT filepath, filename FROM files WHERE filename LIKE %s"
-            elif search_by == 'path':
-                sql = "SELECT filepath, filename FROM files WHERE filepath LIKE %s"
-            elif search_by == 'tags':
-                sql = "SELECT filepath, filename FROM files WHERE tags LIKE %s"
-            else:
-                print("Invalid search_by criteria.")
-                return []
-
-            cursor.execute(sql, (f"%{query}%",))
-            
-            for (filepath, filename) in cursor:
-                results.append({'filepath': filepath, 'filename': filename})
+            cursor = self._get_cursor(sql)
+            cursor.execute(sql, params)
         except Error as e:
+            if fallback is not None and error_code(e) == FULLTEXT_INDEX_MISSING:
+                self._discard_cursor(sql)
+                # Use LIKE for the rest of the session, so repeats are served from the cache.
+                self.fulltext = False
+                yield from self._run_search(*fallback)
+                return
             print(f"Error during search query: {e}")
-        finally:
-            if cursor:
-                cursor.close()
+            # The session may be unusable; the next search takes a fresh connection.
+            self.close()
+            return
+
+        exhausted = False
+        collected = []
+        try:
+            while True:
+                rows = cursor.fetchmany(self.fetch_size)
+                if not rows:
+                    break
+                if collected is not None:
+                    collected.extend(rows)
+                    if len(collected) > MAX_CACHED_ROWS:
+                        collected = None
+                yield from rows
+            exhausted = True
+            if collected is not None:
+                _RESULT_CACHE.put(cache_key, tuple(collected))
+        except Error as e:
+            print(f"Error during search query: {e}")
+            # The session may be unusable; the next search takes a fresh connection.
             self.close()
-        return results
+        finally:
+            if not exhausted and self.connection is not None:
+                try:
+                    if self.connection.unread_result:
+                        # Stopped early; drain the stream so the connection can be reused.
+                        self.connection.consume_results()
+                except Error as e:
+                    print(f"Error releasing search cursor: {e}")
+                    self.close()
+
+    def display_search_results(self, results, limit=None):
+        """Prints results as they arrive from search_files, followed by the total count."""
+        print_search_summary(write_search_results(results), limit)
+
 
-    def display_search_results(self, results):
-        if not results:
-            print("No files or folders found matching your query.")
+class AsyncSearchManager:
+    """
+    Runs searches through an aiomysql pool, so concurrent searches on separate
+    pooled connections overlap their network waits. Requires aiomysql.
+    """
+    def __init__(self, db_config, minsize=2, maxsize=10, fetch_size=1000, fulltext=True):
+        self.db_config = db_config
+        self.minsize = min(minsize, maxsize)
+        self.maxsize = maxsize
+        self.fetch_size = fetch_size
+        self.fulltext = fulltext
+        self.pool = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def connect(self):
+        """Creates the aiomysql connection pool."""
+        if aiomysql is None:
+            print("Error connecting for search: aiomysql is not installed.")
+            return False
+        try:
+            self.pool = await aiomysql.create_pool(
+                host=self.db_config['host'],
+                port=self.db_config['port'],
+                user=self.db_config['user'],
+                password=self.db_config['password'],
+                db=self.db_config['database'],
+                charset='utf8mb4',
+                minsize=self.minsize,
+                maxsize=self.maxsize,
+            )
+            return True
+        except (aiomysql.Error, OSError) as e:
+            print(f"Error connecting for search: {e}")
+            self.pool = None
+            return False
+
+    async def close(self):
+        """Closes the pool once its connections have been released."""
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+
+    async def search_files(self, query, search_by='filename', limit=None):
+        """Asynchronously yields (filepath, filename) tuples, like SearchManager.search_files."""
+        statement = build_search_statement(query, search_by, self.fulltext, limit)
+        if statement is None:
+            print("Invalid search_by criteria.")
             return
+        fallback = build_search_statement(query, search_by, False, limit)
+        async for row in self._run_search(*statement, fallback if fallback != statement else None):
+            yield row
+
+    async def search_files_multi(self, query, fields=('filename', 'path', 'tags'), limit=None):
+        """Asynchronously yields the rows of a single OR query across several fields."""
+        statement = build_multi_search_statement(query, fields, self.fulltext, limit)
+        if statement is None:
+            print("Invalid search_by criteria.")
+            return
+        fallback = build_multi_search_statement(query, fields, False, limit)
+        async for row in self._run_search(*statement, fallback if fallback != statement else None):
+            yield row
+
+    async def _run_search(self, sql, params, fallback=None):
+        """
+        Streams a statement's rows from an unbuffered SSCursor on a connection acquired
+        for this search only, so searches running concurrently never share a cursor.
+        fallback is run instead if a FULLTEXT statement finds no FULLTEXT index.
+        """
+        cache_key = (sql, params)
+        cached_rows = _RESULT_CACHE.get(cache_key)
+        if cached_rows is not None:
+            for row in cached_rows:
+                yield row
+            return
+
+        if self.pool is None and not await self.connect():
+            print("Cannot search: Database connection failed.")
+            return
+
+        collected = []
+        fulltext_index_missing = False
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.cursor(aiomysql.SSCursor) as cursor:
+                    try:
+                        await cursor.execute(sql, params)
+                    except aiomysql.Error as e:
+                        if fallback is None or error_code(e) != FULLTEXT_INDEX_MISSING:
+                            raise
+                        fulltext_index_missing = True
+                    while not fulltext_index_missing:
+                        rows = await cursor.fetchmany(self.fetch_size)
+                        if not rows:
+                            break
+                        if collected is not None:
+                            collected.extend(rows)
+                            if len(collected) > MAX_CACHED_ROWS:
+                                collected = None
+                        for row in rows:
+                            yield row
+            if fulltext_index_missing:
+                self.fulltext = False
+                async for row in self._run_search(*fallback):
+                    yield row
+                return
+            if collected is not None:
+                _RESULT_CACHE.put(cache_key, tuple(collected))
+        except aiomysql.Error as e:
+            print(f"Error during search query: {e}")
 
-        print(f"\nFound {len(results)} results:")
-        for result in results:
-            filepath = result['filepath']
-            filename = result['filename']
-            
-            print(f"\n--- Found: {filename} ---")
-            print(f"  **Location:** {format_navigable_path(filepath)}")
-            print(f"  **Full Path:** {filepath}")
-            
-            print(f"  To navigate, open File Explorer and copy the 'Full Path' and paste it into the address bar.")
-            print(f"  Parent Folder: '{os.path.dirname(filepath)}'")
-            print("=" * 60)
\ No newline at end of file
+    async def display_search_results(self, results, limit=None):
+        """Prints results as they arrive from search_files, followed by the total count."""
+        count = 0
+        rows = []
+        async for row in results:
+            rows.append(row)
+            if len(rows) >= DISPLAY_WRITE_ROWS:
+                count += write_search_results(rows)
+                rows = []
+        count += write_search_results(rows)
+        print_search_summary(count, limit)
@@ -1,95 +1,166 @@
 import os
+import sys
 import configparser
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
+from mysql.connector.pooling import CNX_POOL_MAXSIZE
+
+# Record returned by get_file_metadata and get_file_metadata_from_entry. As a tuple
+# it carries no per-instance __dict__, and it iterates in the order of the files
+# table columns, so records can be unpacked straight into column buffers.
+FileMeta = namedtuple('FileMeta', ('dirpath', 'filename', 'extension', 'size', 'creation_time', 'modification_time', 'tags'))
+
+FILE_METADATA_FIELDS = FileMeta._fields
+
+# Separators a path may use on this platform ('/' and '\\' on Windows).
+PATH_SEPARATORS = os.sep + (os.path.altsep or '')
+
+def get_file_metadata_from_entry(entry, dirpath):
+    """
+    Extracts basic metadata for an os.DirEntry of a file inside dirpath.
+    The entry's cached/fd-relative stat() is used instead of a separate os.stat().
+    Returns None if file is inaccessible.
+    """
+    try:
+        stat_info = entry.stat(follow_symlinks=False)
+    except OSError as e:
+        # Includes FileNotFoundError for files removed mid-scan; stat raises nothing else.
+        print(f"Warning: OS Error accessing {os.path.join(dirpath, entry.name)}: {e}")
+        return None
+    return _file_record(dirpath, entry.name, stat_info)
 
 def get_file_metadata(filepath):
     """
-    Extracts basic metadata for a given file path.
+    Extracts basic metadata for a single file path with os.stat().
+    Directory scans should use get_file_metadata_from_entry instead.
     Returns None if file is inaccessible.
     """
     try:
         stat_info = os.stat(filepath)
-        filename = os.path.basename(filepath)
-        extension = os.path.splitext(filename)[1].lower()
-        if extension.startswith('.'):
-            extension = extension[1:]
-
-        creation_time_ms = int(stat_info.st_ctime * 1000)
-        modification_time_ms = int(stat_info.st_mtime * 1000)
-
-        return {
-            'filepath': filepath,
-            'filename': filename,
-            'extension': extension,
-            'size': stat_info.st_size,
-            'creation_time': creation_time_ms,
-            'modification_time': modification_time_ms,
-            'tags': ''
-        }
-    except FileNotFoundError:
-        print(f"Warning: File not found during metadata collection: {filepath}")
-        return None
     except OSError as e:
         print(f"Warning: OS Error accessing {filepath}: {e}")
         return None
-    except Exception as e:
-        print(f"Warning: Unexpected error with {filepath}: {e}")
-        return None
+    sep_index = max(filepath.rfind(sep) for sep in PATH_SEPARATORS)
+    filename = filepath[sep_index + 1:]
+    head = filepath[:sep_index + 1]
+    dirpath = head.rstrip(PATH_SEPARATORS)
+    if not dirpath or dirpath[-1] == ':':
+        # Keep the separator of a root or drive root, as os.path.split does.
+        dirpath = head
+    return _file_record(dirpath, filename, stat_info)
+
+def _file_record(dirpath, filename, stat_info):
+    """
+    Builds the compact FileMeta record for a file; dirpath is shared
+    across the directory's files and the extension is interned, so the full
+    path is only rebuilt when the row is written.
+    """
+    # Same result as os.path.splitext (leading dots don't start an extension),
+    # without its generic separator handling.
+    dot = filename.rfind('.')
+    if dot > 0 and (filename[0] != '.' or filename[:dot].strip('.')):
+        extension = filename[dot + 1:].lower()
+    else:
+        extension = ''
+
+    # Integer nanoseconds avoid the float rounding of st_ctime * 1000.
+    creation_time_ms = stat_info.st_ctime_ns // 1_000_000
+    modification_time_ms = stat_info.st_mtime_ns // 1_000_000
+
+    return FileMeta(
+        dirpath,
+        filename,
+        sys.intern(extension),
+        stat_info.st_size,
+        creation_time_ms,
+        modification_time_ms,
+        ''
+    )
+
+def error_code(error):
+    """Returns the MySQL error number of a mysql-connector, MySQLdb or aiomysql error, if any."""
+    code = getattr(error, 'errno', None)
+    if code is None and error.args and isinstance(error.args[0], int):
+        code = error.args[0]
+    return code
 
 def parse_db_config(config_file='config/db_config.ini'):
-    """Parses database configuration from an INI file."""
-    config = configparser.ConfigParser()
+    """
+    Parses database configuration from an INI file.
+    The parsed settings are cached until the file's modification time changes and
+    are returned as a read-only mapping shared by every caller.
+    """
     try:
-        config.read(config_file)
-        db_config = config['mysql']
-        return {
-            'host': db_config.get('host', 'localhost'),
-            'port': db_config.getint('port', 3306),
-            'user': db_config.get('user'),
-            'password': db_config.get('password'),
-            'database': db_config.get('database')
-        }
+        return _load_db_config(config_file, os.stat(config_file).st_mtime_ns)
     except Exception as e:
         print(f"Error parsing database configuration: {e}")
         print("Please ensure config/db_config.ini exists and is correctly formatted.")
         exit(1)
 
+@lru_cache(maxsize=4)
+def _load_db_config(config_file, mtime_ns):
+    """Reads the [mysql] section of config_file; mtime_ns only keys the cache."""
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    db_config = config['mysql']
+    return MappingProxyType({
+        'host': db_config.get('host', 'localhost'),
+        'port': db_config.getint('port', 3306),
+        'user': db_config.get('user'),
+        'password': db_config.get('password'),
+        'database': db_config.get('database')
+    })
+
+def parse_search_config(config_file='config/db_config.ini'):
+    """Parses the optional [search] tuning section of the configuration file."""
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    if not config.has_section('search'):
+        return {'pool_size': 1, 'fetch_size': 1000, 'fulltext': True}
+    search_config = config['search']
+    try:
+        settings = {
+            'pool_size': search_config.getint('pool_size', 1),
+            'fetch_size': search_config.getint('fetch_size', 1000),
+            'fulltext': search_config.getboolean('fulltext', True)
+        }
+        if not 1 <= settings['pool_size'] <= CNX_POOL_MAXSIZE:
+            # mysql-connector refuses larger pools with a bare AttributeError.
+            raise ValueError(f"pool_size must be between 1 and {CNX_POOL_MAXSIZE}, got {settings['pool_size']}")
+        if settings['fetch_size'] < 1:
+            raise ValueError(f"fetch_size must be at least 1, got {settings['fetch_size']}")
+        return settings
+    except ValueError as e:
+        print(f"Error parsing search configuration: {e}")
+        print("Please check the [search] section of config/db_config.ini.")
+        exit(1)
+
 def format_navigable_path(filepath):
     """
     Splits a full file path into its components for easier navigation.
+    Returns (navigation string, parent directory), both taken from the same split.
     """
-    parts = []
-    current_path = filepath
-    
-    # Handle drive letters for Windows
-    if os.path.splitdrive(current_path)[0]:
-        parts.append(os.path.splitdrive(current_path)[0])
-        current_path = os.path.splitdrive(current_path)[1]
-
-    # Split the remaining path by directory separators
-    while True:
-        parent, name = os.path.split(current_path)
-        if name:
-            parts.insert(0, name) # Insert at the beginning to reverse order
-        if not parent or parent == os.path.sep: # Stop when we reach the root or empty
-            if parent == os.path.sep: # Add the root separator if present
-                parts.insert(0, os.path.sep)
-            break
-        current_path = parent
-    
-    parts = [part for part in parts if part] # Remove empty strings
+    drive, rest = os.path.splitdrive(filepath)
+    if os.path.altsep:
+        rest = rest.replace(os.path.altsep, os.sep)
+    head, _, name = rest.rstrip(os.sep).rpartition(os.sep)
 
-    nav_output = []
-    if parts:
-        if parts[0].endswith(':') or parts[0] == os.path.sep:
-            nav_output.append(f"{parts[0]}")
-            start_index = 1
-        else:
-            start_index = 0
+    directory_nav, parent_dir = _format_navigable_directory(drive, rest.startswith(os.sep), head)
+    if not name:
+        return directory_nav, parent_dir
+    if not directory_nav:
+        return f"'{name}'", parent_dir
+    return f"{directory_nav} -> '{name}'", parent_dir
 
-        for i in range(start_index, len(parts)):
-            if i == len(parts) - 1:
-                nav_output.append(f"'{parts[i]}'")
-            else:
-                nav_output.append(f"'{parts[i]}'")
-    
-    return " -> ".join(nav_output)
\ No newline at end of file
+@lru_cache(maxsize=4096)
+def _format_navigable_directory(drive, rooted, head):
+    """
+    Formats the directory part of a path for format_navigable_path. Cached because
+    files in the same directory, listed together in search results, share it.
+    """
+    parts = [part for part in head.split(os.sep) if part]
+    nav_output = [drive or os.sep] if drive or rooted else []
+    nav_output.extend(f"'{part}'" for part in parts)
+    parent_dir = drive + (os.sep if rooted else '') + os.sep.join(parts)
+    return " -> ".join(nav_output), parent_dir
\ No newline at end of file
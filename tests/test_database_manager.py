@@ -0,0 +1,145 @@
+import pytest
+from mysql.connector import Error
+
+from src.database_manager import (
+    LOAD_STAGE_SQL, MAX_BATCH_ATTEMPTS, MERGE_STAGE_SQL, DatabaseManager, WriterShard,
+    hash_filepaths, to_tsv_line,
+)
+
+DEADLOCK = 1213
+LOCAL_INFILE_DISABLED = 3948
+DUPLICATE_ENTRY = 1062
+
+
+class StubConnection:
+    """Counts commits and rollbacks made by the writer."""
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class StubCursor:
+    """Records executed statements, failing them with the scripted error codes in order."""
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        if self.failures:
+            failure = self.failures.pop(0)
+            if failure is not None:
+                raise Error(msg="scripted failure", errno=failure)
+
+    def inserts(self):
+        return [sql for sql in self.statements if sql.startswith("INSERT INTO files") and sql != MERGE_STAGE_SQL]
+
+
+def batch(*filenames, dirpath='/data'):
+    """Column buffers in FILE_METADATA_FIELDS order."""
+    count = len(filenames)
+    return [[dirpath] * count, list(filenames), ['txt'] * count, [1] * count, [2] * count, [3] * count, [''] * count]
+
+
+@pytest.fixture
+def manager():
+    return DatabaseManager({}, commit_every=3)
+
+
+def test_to_tsv_line_escapes_terminators_and_hexes_the_hash():
+    row = ('/d/a\tb\nc\\', 'a\tb\nc\\', 'txt', 5, 6, 7, '', b'\x00\xff')
+    assert to_tsv_line(row) == '/d/a\\tb\\nc\\\\\ta\\tb\\nc\\\\\ttxt\t5\t6\t7\t\t00ff\n'
+
+
+def test_hash_filepaths_skips_undecodable_paths():
+    digests = hash_filepaths(['/data/ok', '/data/bad\udcff'])
+    assert len(digests[0]) == 32
+    assert digests[1] is None
+
+
+def test_batches_commit_every_commit_every(manager):
+    cursor, connection, pending, shard = StubCursor(), StubConnection(), [], WriterShard()
+    assert manager._execute_batch(cursor, batch('a', 'b'), connection, pending, shard) == 0
+    assert manager._execute_batch(cursor, batch('c'), connection, pending, shard) == 0
+    assert manager._execute_batch(cursor, batch('d', 'e'), connection, pending, shard) == 5
+    assert connection.commits == 1
+    assert pending == []
+
+
+def test_deadlock_replays_every_pending_batch(manager):
+    cursor, connection, pending, shard = StubCursor(), StubConnection(), [], WriterShard()
+    manager._execute_batch(cursor, batch('a'), connection, pending, shard)
+    cursor.failures = [DEADLOCK]
+    assert manager._execute_batch(cursor, batch('b'), connection, pending, shard) == 0
+    # The first write, the failed second write, then both replayed.
+    assert len(cursor.inserts()) == 4
+    assert connection.rollbacks == 1
+    assert len(pending) == 2
+
+
+def test_deadlock_gives_up_after_max_attempts(manager):
+    cursor, connection, pending, shard = StubCursor(), StubConnection(), [], WriterShard()
+    manager._execute_batch(cursor, batch('a'), connection, pending, shard)
+    cursor.failures = [DEADLOCK] * (2 * MAX_BATCH_ATTEMPTS)
+    assert manager._execute_batch(cursor, batch('b'), connection, pending, shard) == 0
+    assert connection.rollbacks == MAX_BATCH_ATTEMPTS
+    assert pending == []
+
+
+def test_statement_error_drops_only_the_failed_batch(manager, capsys):
+    cursor, connection, pending, shard = StubCursor(), StubConnection(), [], WriterShard()
+    manager._execute_batch(cursor, batch('a', 'b'), connection, pending, shard)
+    cursor.failures = [DUPLICATE_ENTRY]
+    assert manager._execute_batch(cursor, batch('c'), connection, pending, shard) == 0
+    assert connection.rollbacks == 0
+    assert [len(rows) for rows, _ in pending] == [2]
+    assert "Discarded" not in capsys.readouterr().out
+
+
+def test_error_after_a_replay_discards_the_transaction(manager, capsys):
+    cursor, connection, pending, shard = StubCursor(), StubConnection(), [], WriterShard()
+    manager._execute_batch(cursor, batch('a', 'b'), connection, pending, shard)
+    cursor.failures = [DEADLOCK, DUPLICATE_ENTRY]
+    assert manager._execute_batch(cursor, batch('c'), connection, pending, shard) == 0
+    assert connection.rollbacks == 2
+    assert pending == []
+    assert "Discarded 3 uncommitted rows." in capsys.readouterr().out
+
+
+def test_rejected_load_data_falls_back_without_using_an_attempt(manager):
+    cursor, connection, pending, shard = StubCursor(), StubConnection(), [], WriterShard(use_load_data=True)
+    # DELETE succeeds, LOAD DATA is refused, then the INSERT replays deadlock until the last attempt.
+    cursor.failures = [None, LOCAL_INFILE_DISABLED] + [DEADLOCK] * (MAX_BATCH_ATTEMPTS - 1)
+    assert manager._execute_batch(cursor, batch('a'), connection, pending, shard) == 0
+    assert shard.use_load_data is False
+    assert len(cursor.inserts()) == MAX_BATCH_ATTEMPTS
+    assert [len(rows) for rows, _ in pending] == [1]
+
+
+def test_deadlock_during_load_data_keeps_the_bulk_path(manager):
+    cursor, connection, pending, shard = StubCursor(), StubConnection(), [], WriterShard(use_load_data=True)
+    # DELETE and LOAD DATA succeed, the MERGE deadlocks, then the replay succeeds.
+    cursor.failures = [None, None, DEADLOCK]
+    assert manager._execute_batch(cursor, batch('a'), connection, pending, shard) == 0
+    assert shard.use_load_data is True
+    assert cursor.inserts() == []
+    assert cursor.statements.count(LOAD_STAGE_SQL) == 2
+
+
+def test_staging_table_is_cleared_without_an_implicit_commit(manager):
+    cursor, connection, pending, shard = StubCursor(), StubConnection(), [], WriterShard(use_load_data=True)
+    manager._execute_batch(cursor, batch('a'), connection, pending, shard)
+    assert cursor.statements == ["DELETE FROM files_stage", LOAD_STAGE_SQL, MERGE_STAGE_SQL]
+
+
+def test_undecodable_paths_are_skipped(manager, capsys):
+    cursor, connection, pending, shard = StubCursor(), StubConnection(), [], WriterShard()
+    manager._execute_batch(cursor, batch('ok', 'bad\udcff'), connection, pending, shard)
+    assert [row[1] for row in pending[0][0]] == ['ok']
+    assert "not valid UTF-8" in capsys.readouterr().out
@@ -0,0 +1,16 @@
+import argparse
+
+import pytest
+
+from src.main import positive_int
+
+
+def test_positive_int_accepts_whole_numbers():
+    assert positive_int('1') == 1
+    assert positive_int('500') == 500
+
+
+@pytest.mark.parametrize('value', ['0', '-3', 'x', '1.5', ''])
+def test_positive_int_rejects_everything_else(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        positive_int(value)
@@ -0,0 +1,53 @@
+from src.search_manager import (
+    _FULLTEXT_SQL, _SQL, build_multi_search_statement, build_search_statement,
+    to_fulltext_query, with_limit,
+)
+
+
+def test_fulltext_query_keeps_underscores_inside_words():
+    assert to_fulltext_query('annual_report') == '+annual_report*'
+
+
+def test_fulltext_query_splits_on_punctuation():
+    assert to_fulltext_query('report.pdf') == '+report* +pdf*'
+
+
+def test_fulltext_query_rejects_words_below_the_token_size():
+    assert to_fulltext_query('q3 report') is None
+    assert to_fulltext_query('...') is None
+
+
+def test_filename_search_uses_fulltext_when_possible():
+    assert build_search_statement('annual_report', 'filename') == (_FULLTEXT_SQL['filename'], ('+annual_report*',))
+
+
+def test_filename_search_uses_like_without_fulltext():
+    assert build_search_statement('annual_report', 'filename', fulltext=False) == (_SQL['filename'], ('%annual_report%',))
+
+
+def test_path_search_always_uses_like():
+    assert build_search_statement('projects', 'path') == (_SQL['path'], ('%projects%',))
+
+
+def test_unknown_search_by_is_rejected():
+    assert build_search_statement('x', 'owner') is None
+    assert build_multi_search_statement('x', ('filename', 'owner')) is None
+
+
+def test_limit_is_bound_as_a_parameter():
+    sql, params = build_search_statement('report', 'path', limit=500)
+    assert sql == _SQL['path'] + " LIMIT %s"
+    assert params == ('%report%', 500)
+
+
+def test_no_limit_leaves_the_statement_unbounded():
+    assert with_limit("SELECT 1", ('a',), None) == ("SELECT 1", ('a',))
+
+
+def test_multi_search_binds_the_pattern_once_per_field():
+    sql, params = build_multi_search_statement('plan', ('filename', 'path', 'tags'), limit=10)
+    assert sql == (
+        "SELECT filepath, filename FROM files WHERE "
+        "filename LIKE %s OR filepath LIKE %s OR tags LIKE %s LIMIT %s"
+    )
+    assert params == ('%plan%', '%plan%', '%plan%', 10)
@@ -0,0 +1,46 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils import _file_record, error_code, format_navigable_path
+
+
+def stat_result(ctime_ns=1_700_000_000_123_456_789, mtime_ns=1_700_000_001_999_999_999):
+    return SimpleNamespace(st_size=42, st_ctime_ns=ctime_ns, st_mtime_ns=mtime_ns)
+
+
+@pytest.mark.parametrize('filename', [
+    'report.pdf', 'archive.tar.gz', 'README', '.bashrc', '..hidden', '...', '.config.yml',
+    'trailing.', 'UPPER.TXT', 'a.b.c', '.', 'x..y',
+])
+def test_extension_matches_splitext(filename):
+    expected = os.path.splitext(filename)[1][1:].lower()
+    assert _file_record('/data', filename, stat_result()).extension == expected
+
+
+def test_times_are_whole_milliseconds_without_float_rounding():
+    record = _file_record('/data', 'a.txt', stat_result())
+    assert record.creation_time == 1_700_000_000_123
+    assert record.modification_time == 1_700_000_001_999
+
+
+def test_navigable_path_and_parent():
+    assert format_navigable_path('/home/user/annual_report.pdf') == (
+        "/ -> 'home' -> 'user' -> 'annual_report.pdf'", '/home/user'
+    )
+    assert format_navigable_path('/top.txt') == ("/ -> 'top.txt'", '/')
+    assert format_navigable_path('relative/file.txt') == ("'relative' -> 'file.txt'", 'relative')
+
+
+def test_navigable_path_with_doubled_separators():
+    assert format_navigable_path('//x//y') == ("/ -> 'x' -> 'y'", '/x')
+
+
+def test_error_code_reads_errno_or_first_argument():
+    class ConnectorError(Exception):
+        errno = 1191
+
+    assert error_code(ConnectorError()) == 1191
+    assert error_code(Exception(1213, 'Deadlock found')) == 1213
+    assert error_code(Exception('no code')) is None